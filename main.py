@@ -1,7 +1,20 @@
+import argparse
+import asyncio
+import functools
 import json
-import googleapiclient
+import threading
+
+import google.auth.transport.requests
+import httpx
+import requests
+import tenacity
 from google.oauth2 import service_account
-from googleapiclient import discovery
+
+# orjson is optional and only used to pretty-print responses with --verbose
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # ------------------------------------------------------------------------------
 # GCP Based Validation of API Callers (EXAMPLE)
@@ -20,10 +33,17 @@ from googleapiclient import discovery
 # --- Configuration ---
 key_path = "./my-service-account-keyfile.json"
 
+
+# Parsing the key file and importing the private key is done once per process.
+# A long running validator reuses the same credentials for every caller.
+@functools.lru_cache(maxsize=1)
+def _get_credentials(path):
+    return service_account.Credentials.from_service_account_file(path)
+
+
+# Load eagerly so a missing or invalid key file is reported at startup
 try:
-    credentials = service_account.Credentials.from_service_account_file(
-        key_path
-    )
+    _get_credentials(key_path)
     print("Successfully loaded credentials from key file.")
 except FileNotFoundError:
     print(f"ERROR: Service account key file not found at: {key_path}")
@@ -32,6 +52,138 @@ except Exception as e:
     print(f"ERROR: Could not load credentials: {e}")
     exit(1)
 
+
+def _dumps(response):
+    if orjson is not None:
+        return orjson.dumps(response, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(response, indent=2)
+
+
+# --- Shared Authorized Transport ---
+# The three lookups are plain GETs against REST endpoints whose URLs are known
+# up front, so they are sent directly rather than through discovery based API
+# clients. They go through one httpx client speaking HTTP/2, so lookups to the
+# same API are multiplexed over a single TLS connection instead of queueing on
+# HTTP/1.1 keep-alive connections. Access tokens are minted by google-auth over
+# a pooled requests session to oauth2.googleapis.com.
+# httpx sends 'Accept-Encoding: gzip, deflate'; googleapis.com only compresses
+# responses when the user-agent also contains 'gzip'.
+request_timeout = 10
+token_session = requests.Session()
+
+# Access tokens are valid for about an hour and are cached on the shared
+# credentials object. Refreshes are serialized so concurrent lookups waiting on
+# an expired or rejected token mint one new token between them.
+_token_lock = threading.Lock()
+
+
+def _refresh_token(credentials, stale_token=None):
+    with _token_lock:
+        if credentials.valid and credentials.token != stale_token:
+            # Another caller refreshed it while this one waited
+            return
+        credentials.refresh(google.auth.transport.requests.Request(token_session))
+
+
+class GoogleAuth(httpx.Auth):
+    """Authorizes httpx.AsyncClient requests with google-auth credentials."""
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+
+    async def _refresh(self, stale_token=None):
+        await asyncio.to_thread(_refresh_token, self.credentials, stale_token)
+
+    async def async_auth_flow(self, request):
+        if not self.credentials.valid:
+            await self._refresh()
+        sent_token = self.credentials.token
+        request.headers["Authorization"] = f"Bearer {sent_token}"
+        response = yield request
+
+        if response.status_code == 401:
+            # The token was revoked or expired early, retry once with a new one.
+            # Only the token this request sent is stale; if another request has
+            # already replaced it, the retry reuses that replacement.
+            await self._refresh(stale_token=sent_token)
+            request.headers["Authorization"] = f"Bearer {self.credentials.token}"
+            yield request
+
+
+# One client, and so one connection pool, is shared by every validation in the
+# process. An async server should await the lookups on its own event loop and
+# call close_client() on shutdown rather than opening a client per caller.
+_shared_client = None
+
+
+def get_client():
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = httpx.AsyncClient(
+            http2=True,
+            auth=GoogleAuth(_get_credentials(key_path)),
+            headers={"User-Agent": f"python-httpx/{httpx.__version__} (gzip)"},
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=request_timeout,
+        )
+    return _shared_client
+
+
+async def close_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+
+
+# --- Lookup Helper ---
+# Every lookup is a GET of a single resource that only reads a few fields.
+# Failures are classified the same way for all of them and returned as an
+# (ok, response_or_error) pair so callers only have to report the outcome.
+# Rate limiting and transient server errors are retried with exponential
+# backoff and jitter before they are reported.
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _is_retryable(e):
+    return (
+        isinstance(e, httpx.HTTPStatusError)
+        and e.response.status_code in RETRYABLE_STATUSES
+    )
+
+
+@tenacity.retry(
+    retry=tenacity.retry_if_exception(_is_retryable),
+    wait=tenacity.wait_exponential_jitter(initial=0.1, max=2.0),
+    stop=tenacity.stop_after_attempt(4),
+    reraise=True,
+)
+async def _get(client, url, fields):
+    response = await client.get(url, params={"fields": fields})
+    response.raise_for_status()
+    return response.json()
+
+
+async def do_get(
+    client, url, *, fields, kind, permission, not_found, permission_denied=None
+):
+    try:
+        return True, await _get(client, url, fields)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 403:
+            if permission_denied is not None:
+                return False, permission_denied
+            return False, (
+                f"ERROR: Permission denied. The service account likely needs '{permission}' permission."
+            )
+        elif e.response.status_code == 404:
+            return False, f"ERROR: {not_found}"
+        else:
+            return False, f"ERROR: HTTP error occurred: {e}"
+    except Exception as e:
+        return False, f"ERROR: Failed to get {kind}: {e}"
+
+
 # ------------------------------------------------------------------------------
 # Project Lookup
 # ------------------------------------------------------------------------------
@@ -50,43 +202,45 @@ except Exception as e:
 
 # --- Configuration ---
 project_id = "my-project"
-project_allow_list = ["112233445566"]
+project_allow_list = frozenset({"112233445566"})
+
+# Resource URLs only depend on the configuration, so they are built once
+project_url = f"https://cloudresourcemanager.googleapis.com/v3/projects/{project_id}"
 
-# --- Build Cloud Resource Manager API Client ---
-try:
-    service = discovery.build("cloudresourcemanager", "v3", credentials=credentials)
-except Exception as e:
-    print(f"ERROR: Could not build API client: {e}")
-    exit(1)
 
 # --- Describe Project ---
-try:
-    print(f"Describing project: {project_id}")
-    # The projects().get() method requires the name to be in the format 'projects/PROJECT_ID'
-    project_name = f"projects/{project_id}"
-    request = service.projects().get(name=project_name)
-    response = request.execute()
+async def lookup_project(client):
+    return await do_get(
+        client,
+        project_url,
+        fields="name,projectId",
+        kind="project",
+        permission="resourcemanager.projects.get",
+        not_found=f"Project '{project_id}' not found.",
+        # Resource Manager also answers 403 for projects that do not exist or
+        # cannot be seen, and when the API is disabled
+        permission_denied=(
+            f"ERROR: Failed to describe project {project_id}: permission denied (403)\n"
+            "Possible reasons:\n"
+            "- The service account may not have the 'resourcemanager.projects.get' permission on this project.\n"
+            "- The project ID might be incorrect.\n"
+            "- Cloud Resource Manager API might not be enabled in the project associated with the service account."
+        ),
+    )
+
 
-    print("\n--- Project Description ---")
-    print(json.dumps(response, indent=2))
-    print("--- End of Project Description ---")
+def report_project(response, verbose):
+    if verbose:
+        print("\n--- Project Description ---")
+        print(_dumps(response))
+        print("--- End of Project Description ---")
 
-    project_number = response.get("name").split("/")[-1]
+    project_number = response["name"].rpartition("/")[2]
     if project_number in project_allow_list:
         print(f"\nFound Project Number: {project_number} in Allow List")
     else:
         print(f"\nError: Project {project_id} not found in Allow List")
 
-except Exception as e:
-    print(f"ERROR: Failed to describe project {project_id}: {e}")
-    print("Possible reasons:")
-    print(
-        "- The service account may not have the 'resourcemanager.projects.get' permission on this project."
-    )
-    print("- The project ID might be incorrect.")
-    print(
-        "- Cloud Resource Manager API might not be enabled in the project associated with the service account."
-    )
 
 # ------------------------------------------------------------------------------
 # IP Address lookup
@@ -110,31 +264,34 @@ except Exception as e:
 # -----------------------------------------------------------------------------
 
 # --- Configuration ---
-project_id = "my-project"
+# project_id is shared with the project lookup above
 address_region = "us-central1"
 address_name = "us-central1-nat-ip01"
-address_allow_list = ["34.107.21.167", "34.107.21.168"]
+address_allow_list = frozenset({"34.107.21.167", "34.107.21.168"})
+
+address_url = (
+    f"https://compute.googleapis.com/compute/v1/projects/{project_id}"
+    f"/regions/{address_region}/addresses/{address_name}"
+)
 
-# --- Build Compute Engine API Client ---
-try:
-    service = discovery.build("compute", "v1", credentials=credentials)
-except Exception as e:
-    print(f"ERROR: Could not build API client: {e}")
-    exit(1)
 
 # --- Get Specific IP Address by Name and Region ---
-try:
-    print(
-        f"\nLooking up address: {address_name} in project: {project_id}, region: {address_region}"
-    )
-    request = service.addresses().get(
-        project=project_id, region=address_region, address=address_name
+async def lookup_address(client):
+    return await do_get(
+        client,
+        address_url,
+        fields="address,name",
+        kind="address",
+        permission="compute.addresses.get",
+        not_found=f"Address resource '{address_name}' not found in region '{address_region}' for project '{project_id}'.",
     )
-    response = request.execute()
 
-    print("\n--- Address Details ---")
-    print(json.dumps(response, indent=2))
-    print("--- End of Address Details ---")
+
+def report_address(response, verbose):
+    if verbose:
+        print("\n--- Address Details ---")
+        print(_dumps(response))
+        print("--- End of Address Details ---")
 
     ip_address = response.get("address")
     if ip_address in address_allow_list:
@@ -142,20 +299,6 @@ try:
     else:
         print(f"\nError: Address {address_name} not found in Allow List")
 
-except googleapiclient.errors.HttpError as e:
-    if e.resp.status == 403:
-        print(
-            f"ERROR: Permission denied. The service account likely needs 'compute.addresses.get' permission."
-        )
-    elif e.resp.status == 404:
-        print(
-            f"ERROR: Address resource '{address_name}' not found in region '{address_region}' for project '{project_id}'."
-        )
-    else:
-        print(f"ERROR: HTTP error occurred: {e}")
-except Exception as e:
-    print(f"ERROR: Failed to get address: {e}")
-
 
 # ------------------------------------------------------------------------------
 # GKE Cluster Lookup
@@ -175,38 +318,86 @@ except Exception as e:
 # ------------------------------------------------------------------------------
 
 # --- Configuration ---
-project_id = "my-project"
+# project_id is shared with the project lookup above
 cluster_name = "cluster-1"
 # In GKE clusters may be regional or zonal, hence 'location'
 # In BMAP they should always be regional
 location = "us-central1"
 
-# --- Build GKE API Client ---
-try:
-    service = discovery.build('container', 'v1', credentials=credentials)
-except Exception as e:
-    print(f"ERROR: Could not build API client: {e}")
-    exit(1)
+# Construct the full cluster name path
+cluster_resource_name = f"projects/{project_id}/locations/{location}/clusters/{cluster_name}"
+cluster_url = f"https://container.googleapis.com/v1/{cluster_resource_name}"
+
 
 # --- Get Specific GKE Cluster ---
-try:
-    # Construct the full cluster name path
-    cluster_resource_name = f"projects/{project_id}/locations/{location}/clusters/{cluster_name}"
-    print(f"\nLooking up GKE cluster: {cluster_resource_name}")
-
-    request = service.projects().locations().clusters().get(name=cluster_resource_name)
-    response = request.execute()
-
-    print("\n--- GKE Cluster Details ---")
-    print(json.dumps(response, indent=2))
-    print("--- End of GKE Cluster Details ---")
-
-except googleapiclient.errors.HttpError as e:
-    if e.resp.status == 403:
-        print(f"ERROR: Permission denied. The service account likely needs 'container.clusters.get' permission.")
-    elif e.resp.status == 404:
-        print(f"ERROR: GKE Cluster '{cluster_name}' not found in location '{location}' for project '{project_id}'.")
-    else:
-        print(f"ERROR: HTTP error occurred: {e}")
-except Exception as e:
-    print(f"ERROR: Failed to get GKE cluster: {e}")
+async def lookup_cluster(client):
+    return await do_get(
+        client,
+        cluster_url,
+        fields="name,status,location",
+        kind="GKE cluster",
+        permission="container.clusters.get",
+        not_found=f"GKE Cluster '{cluster_name}' not found in location '{location}' for project '{project_id}'.",
+    )
+
+
+def report_cluster(response, verbose):
+    print(f"\nFound GKE Cluster: {response.get('name')} ({response.get('status')})")
+    if verbose:
+        print("\n--- GKE Cluster Details ---")
+        print(_dumps(response))
+        print("--- End of GKE Cluster Details ---")
+
+
+# ------------------------------------------------------------------------------
+# Run Lookups
+# ------------------------------------------------------------------------------
+# The three lookups are independent and network bound, so they run
+# concurrently on one event loop. Each request only asks for the fields the
+# checks read; pass --verbose to print them.
+#
+# The lookups are not sent as one batch request: each API has its own batch
+# endpoint on its own host and the global www.googleapis.com/batch endpoint has
+# been retired, so a batch would still be three HTTP calls.
+# ------------------------------------------------------------------------------
+async def run_lookups(verbose):
+    lookups = [
+        (lookup_project, report_project),
+        (lookup_address, report_address),
+        (lookup_cluster, report_cluster),
+    ]
+    client = get_client()
+    results = await asyncio.gather(*(lookup(client) for lookup, _ in lookups))
+
+    for (_, report), (ok, result) in zip(lookups, results):
+        if ok:
+            report(result, verbose)
+        else:
+            print(result)
+
+
+async def _run(verbose):
+    try:
+        await run_lookups(verbose)
+    finally:
+        await close_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GCP based validation of API callers")
+    parser.add_argument(
+        "--verbose", action="store_true", help="print the API responses"
+    )
+    args = parser.parse_args()
+
+    print(f"Describing project: {project_id}")
+    print(
+        f"Looking up address: {address_name} in project: {project_id}, region: {address_region}"
+    )
+    print(f"Looking up GKE cluster: {cluster_resource_name}")
+
+    asyncio.run(_run(args.verbose))
+
+
+if __name__ == "__main__":
+    main()